@@ -2,7 +2,7 @@
 import fnmatch
 import logging
 import re
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Type
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Type
 
 from . import inputs, orders, recipes
 from .config import Config
@@ -52,6 +52,9 @@ class Flavour:
         if steps is not None:
             for name, options in steps.items():
                 self.steps[name] = StepConfig(name, options)
+        # StepConfig for steps not configured in the flavour, created on
+        # demand and reused, so that they can cache merged defaults
+        self.default_steps: Dict[str, StepConfig] = {}
 
         self.postprocessors: List[Postprocessor] = []
         if postprocess is not None:
@@ -132,7 +135,9 @@ class Flavour:
         """
         res = self.steps.get(name)
         if res is None:
-            res = StepConfig(name)
+            res = self.default_steps.get(name)
+            if res is None:
+                res = self.default_steps[name] = StepConfig(name)
         return res
 
     def list_inputs_recursive(self, recipe: "recipes.Recipe", pantry: "pantry.Pantry") -> List[str]:
@@ -174,9 +179,17 @@ class Flavour:
                 input_names.add(input_name)
         return input_names
 
-    def make_orders(self, recipe: "recipes.Recipe", pantry: "pantry.DiskPantry") -> List["orders.Order"]:
+    def make_orders(
+        self,
+        recipe: "recipes.Recipe",
+        pantry: "pantry.DiskPantry",
+        instant_filter: Optional[Callable[["Instant"], bool]] = None,
+    ) -> List["orders.Order"]:
         """
         Scan a recipe and return a set with all the inputs it needs
+
+        If instant_filter is given, only generate orders for the output
+        instants for which it returns True
         """
         # For each output instant, map inputs names to InputFile structures
         inputs: Optional[Dict["Instant", Dict[str, "InputFile"]]] = None
@@ -231,6 +244,9 @@ class Flavour:
                 for output_instant in instants_to_delete:
                     del inputs[output_instant]
 
+        if inputs is not None and instant_filter is not None:
+            inputs = {k: v for k, v in inputs.items() if instant_filter(k)}
+
         return self.inputs_to_orders(recipe, inputs, inputs_for_all_instants)
 
     def inputs_to_orders(
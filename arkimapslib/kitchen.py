@@ -3,10 +3,16 @@ import contextlib
 import datetime
 import os
 import tempfile
-from typing import Any, Dict, List, Optional, Set, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 import yaml
 
+try:
+    # Use libyaml when available, as it parses recipes much faster
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader  # type: ignore
+
 try:
     import arkimet
 
@@ -18,22 +24,40 @@ from . import orders, pantry
 from .config import Config
 from .flavours import Flavour
 from .lint import Lint
-from .recipes import Recipe
-from .inputs import ModelStep
+from .recipes import Recipe, Recipes
+from .inputs import Input, Instant, ModelStep
 
 # if TYPE_CHECKING:
 # Used for kwargs-style dicts
 Kwargs = Dict[str, Any]
 
 
+def read_recipe_dir(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Parse all the YAML files in a recipe directory.
+
+    Generate (file name relative to path, parsed YAML) pairs
+    """
+    for dirpath, dirnames, fnames in os.walk(path):
+        relpath = os.path.relpath(dirpath, start=path)
+        for fn in fnames:
+            if not fn.endswith(".yaml"):
+                continue
+            with open(os.path.join(dirpath, fn), "rt") as fd:
+                recipe = yaml.load(fd, Loader=YamlLoader)
+            if relpath == ".":
+                relfn = fn
+            else:
+                relfn = os.path.join(relpath, fn)
+            yield relfn, recipe
+
+
 class Kitchen:
     """
     Shared context for this arkimaps run
     """
 
     def __init__(self, config: Optional[Config] = None):
-        from .recipes import Recipes
-
         if config is None:
             self.config = Config()
         else:
@@ -58,66 +82,65 @@ class Kitchen:
 
         self.recipes.resolve_derived(lint=lint)
 
-    def load_recipe_dir(self, path: str, *, lint: Optional[Lint] = None):
+    def load_recipe_dir(
+        self,
+        path: str,
+        *,
+        lint: Optional[Lint] = None,
+        contents: Optional[Iterable[Tuple[str, Dict[str, Any]]]] = None,
+    ):
         """
         Load recipes from the given directory
-        """
-        from .inputs import Input
 
+        If contents is given, it is used instead of reading the YAML files in
+        the directory, as a sequence of (relative file name, parsed YAML)
+        pairs like the one returned by read_recipe_dir. The parsed YAML is
+        modified while loading it.
+        """
         path = os.path.abspath(path)
         if path not in self.config.static_dir:
             self.config.static_dir.insert(0, os.path.join(path, "static"))
 
-        for dirpath, dirnames, fnames in os.walk(path):
-            relpath = os.path.relpath(dirpath, start=path)
-            for fn in fnames:
-                if not fn.endswith(".yaml"):
-                    continue
-                with open(os.path.join(dirpath, fn), "rt") as fd:
-                    recipe = yaml.load(fd, Loader=yaml.SafeLoader)
-                if relpath == ".":
-                    relfn = fn
-                else:
-                    relfn = os.path.join(relpath, fn)
-
-                inputs = recipe.pop("inputs", None)
-                if inputs is not None:
-                    for name, input_contents in inputs.items():
-                        if "_" in name:
-                            raise RuntimeError(f"{relfn}: '_' not allowed in input name {name!r}")
-                        if isinstance(input_contents, list):
-                            for ic in input_contents:
-                                self.pantry.add_input(
-                                    Input.create(config=self.config, name=name, defined_in=relfn, lint=lint, **ic)
-                                )
-                        else:
+        if contents is None:
+            contents = read_recipe_dir(path)
+
+        for relfn, recipe in contents:
+            inputs = recipe.pop("inputs", None)
+            if inputs is not None:
+                for name, input_contents in inputs.items():
+                    if "_" in name:
+                        raise RuntimeError(f"{relfn}: '_' not allowed in input name {name!r}")
+                    if isinstance(input_contents, list):
+                        for ic in input_contents:
                             self.pantry.add_input(
-                                Input.create(
-                                    config=self.config, name=name, defined_in=relfn, lint=lint, **input_contents
-                                )
+                                Input.create(config=self.config, name=name, defined_in=relfn, lint=lint, **ic)
                             )
-
-                flavours = recipe.pop("flavours", None)
-                if flavours is not None:
-                    for flavour in flavours:
-                        name = flavour.pop("name", None)
-                        if name is None:
-                            raise RuntimeError(f"{relfn}: found flavour without name")
-                        old = self.flavours.get(name)
-                        if old is not None:
-                            raise RuntimeError(f"{relfn}: flavour {name} was already defined in {old.defined_in}")
-                        self.flavours[name] = Flavour.create(
-                            config=self.config, name=name, defined_in=relfn, lint=lint, **flavour
+                    else:
+                        self.pantry.add_input(
+                            Input.create(config=self.config, name=name, defined_in=relfn, lint=lint, **input_contents)
                         )
 
-                recipe["name"] = relfn[:-5]
-                recipe["defined_in"] = relfn
+            flavours = recipe.pop("flavours", None)
+            if flavours is not None:
+                for flavour in flavours:
+                    name = flavour.pop("name", None)
+                    if name is None:
+                        raise RuntimeError(f"{relfn}: found flavour without name")
+                    old = self.flavours.get(name)
+                    if old is not None:
+                        raise RuntimeError(f"{relfn}: flavour {name} was already defined in {old.defined_in}")
+                    self.flavours[name] = Flavour.create(
+                        config=self.config, name=name, defined_in=relfn, lint=lint, **flavour
+                    )
+
+            recipe["name"] = relfn[:-5]
+            recipe["defined_in"] = relfn
 
-                if "recipe" in recipe:
-                    self.recipes.add(lint=lint, **recipe)
+            if "recipe" in recipe:
+                self.recipes.add(lint=lint, **recipe)
 
-                if "extends" in recipe:
-                    self.recipes.add_derived(lint=lint, **recipe)
+            if "extends" in recipe:
+                self.recipes.add_derived(lint=lint, **recipe)
 
     def list_inputs(self, flavours: List[Flavour]) -> Set[str]:
         """
@@ -201,13 +224,15 @@ class WorkingKitchen(Kitchen):
         """
         Generate all possible orders for all available recipes
         """
-        selected = []
-        for order in flavour.make_orders(recipe, self.pantry):
-            if step is not None and order.instant.step != step:
-                continue
-            if reftime is not None and order.instant.reftime != reftime:
-                continue
-            selected.append(order)
+
+        def instant_filter(instant: Instant) -> bool:
+            if step is not None and instant.step != step:
+                return False
+            if reftime is not None and instant.reftime != reftime:
+                return False
+            return True
+
+        selected = flavour.make_orders(recipe, self.pantry, instant_filter=instant_filter)
         if not selected:
             raise RuntimeError(f"not enough data to prepare {recipe.name}")
         selected.sort(key=lambda x: x.instant)
@@ -256,9 +281,7 @@ class ArkimetEmptyKitchen(ArkimetRecipesMixin, Kitchen):
 class ArkimetKitchen(ArkimetRecipesMixin, WorkingKitchen):
     def __init__(self, *args, **kw):
         super().__init__(*args, **kw)
-        from .pantry import ArkimetPantry
-
-        self.pantry = ArkimetPantry(root=self.workdir, session=self.session)
+        self.pantry = pantry.ArkimetPantry(root=self.workdir, session=self.session)
 
 
 class EccodesEmptyKitchen(Kitchen):
@@ -46,6 +46,18 @@ class Order(ABC):
     input files
     """
 
+    __slots__ = (
+        "flavour",
+        "recipe",
+        "mixer",
+        "input_files",
+        "instant",
+        "order_steps",
+        "output_options",
+        "output",
+        "render_time_ns",
+    )
+
     def __init__(
         self,
         *,
@@ -163,6 +175,8 @@ class Order(ABC):
 
 
 class MapOrder(Order):
+    __slots__ = ()
+
     def __init__(
         self,
         *,
@@ -224,6 +238,8 @@ def deg2num(lon_deg: float, lat_deg: float, zoom: int) -> Tuple[int, int]:
 
 
 class TileOrder(Order):
+    __slots__ = ("x", "y", "z", "width", "height")
+
     def __init__(
         self,
         *,
@@ -445,6 +461,8 @@ class TileOrder(Order):
 
 
 class LegendOrder(Order):
+    __slots__ = ()
+
     def __init__(
         self,
         *,
@@ -482,7 +500,8 @@ class LegendOrder(Order):
         if grib_step is not None:
             self.order_steps.append(grib_step)
 
-        params = contour_step.params["params"]
+        # Copy params, as they are shared with the recipe
+        contour_step.params["params"] = params = dict(contour_step.params["params"])
         params["legend"] = "on"
         params["legend_text_font_size"] = "25%"
         params["legend_border_thickness"] = 4
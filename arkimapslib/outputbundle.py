@@ -29,6 +29,7 @@ Example program to show all products in a zip bundle::
 """
 
 import datetime
+import functools
 import io
 import json
 import logging
@@ -39,6 +40,13 @@ from collections import Counter, defaultdict
 from pathlib import Path
 from typing import IO, TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
 
+try:
+    import orjson
+
+    HAVE_ORJSON = True
+except ModuleNotFoundError:
+    HAVE_ORJSON = False
+
 from . import steps
 from .types import ModelStep
 
@@ -52,6 +60,45 @@ if TYPE_CHECKING:
 log = logging.getLogger("outputbundle")
 
 
+def _json_dumps(data: Any) -> bytes:
+    """
+    Serialize data to indented JSON, using orjson if available
+    """
+    if HAVE_ORJSON:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        return json.dumps(data, indent=2).encode()
+
+
+def _json_loads(data: bytes) -> Any:
+    """
+    Parse JSON data, using orjson if available
+    """
+    if HAVE_ORJSON:
+        return orjson.loads(data)
+    else:
+        return json.loads(data)
+
+
+@functools.lru_cache(maxsize=128)
+def _format_reftime(reftime: datetime.datetime) -> str:
+    """
+    Format a reference time for JSON metadata.
+
+    Reference times repeat across all the products of a run, so conversions
+    are cached, as strftime and strptime are slow
+    """
+    return reftime.strftime("%Y-%m-%d %H:%M:%S")
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_reftime(reftime: str) -> datetime.datetime:
+    """
+    Parse a reference time from JSON metadata
+    """
+    return datetime.datetime.strptime(reftime, "%Y-%m-%d %H:%M:%S")
+
+
 class Serializable(ABC):
     """
     Base for classes that can be serialized to JSON
@@ -167,7 +214,7 @@ class ReftimeOrders(Serializable):
         self.render_time_ns = render_time_ns
 
     def add(self, order: "Order"):
-        self.inputs.update(order.input_files.keys())
+        self.inputs.update(order.input_files)
         self.steps[order.instant.step] += 1
         self.render_time_ns += order.render_time_ns
 
@@ -214,19 +261,14 @@ class RecipeOrders(Serializable):
 
     def to_jsonable(self) -> Dict[str, Any]:
         return {
-            "reftimes": {
-                reftime.strftime("%Y-%m-%d %H:%M:%S"): stats.to_jsonable() for reftime, stats in self.by_reftime.items()
-            },
+            "reftimes": {_format_reftime(reftime): stats.to_jsonable() for reftime, stats in self.by_reftime.items()},
             "legend_info": self.legend_info,
         }
 
     @classmethod
     def from_jsonable(cls, data: Dict[str, Any]):
         res = cls()
-        res.by_reftime = {
-            datetime.datetime.strptime(k, "%Y-%m-%d %H:%M:%S"): ReftimeOrders.from_jsonable(v)
-            for k, v in data["reftimes"].items()
-        }
+        res.by_reftime = {_parse_reftime(k): ReftimeOrders.from_jsonable(v) for k, v in data["reftimes"].items()}
         res.legend_info = data.get("legend_info")
         return res
 
@@ -271,7 +313,7 @@ class ProductInfo(Serializable):
     def to_jsonable(self) -> Dict[str, Any]:
         res = {
             "recipe": self.recipe,
-            "reftime": self.reftime.strftime("%Y-%m-%d %H:%M:%S"),
+            "reftime": _format_reftime(self.reftime),
             "step": str(self.step),
         }
         if self.georef:
@@ -282,7 +324,7 @@ class ProductInfo(Serializable):
     def from_jsonable(cls, data: Dict[str, Any]):
         return cls(
             recipe=data["recipe"],
-            reftime=datetime.datetime.strptime(data["reftime"], "%Y-%m-%d %H:%M:%S"),
+            reftime=_parse_reftime(data["reftime"]),
             step=data["step"],
             georef=data.get("georef", None),
         )
@@ -471,7 +513,7 @@ class TarReader(Reader):
 
     def _load_json(self, path: str) -> Dict[str, Any]:
         with self.tarfile.extractfile(path) as fd:
-            return json.load(fd)
+            return _json_loads(fd.read())
 
     def version(self) -> str:
         with self.tarfile.extractfile("version.txt") as fd:
@@ -518,7 +560,7 @@ class ZipReader(Reader):
         self.zipfile.close()
 
     def _load_json(self, path: str) -> Dict[str, Any]:
-        return json.loads(self.zipfile.read(path))
+        return _json_loads(self.zipfile.read(path))
 
     def version(self) -> str:
         return self.zipfile.read("version.txt").strip().decode()
@@ -608,7 +650,7 @@ class TarWriter(Writer):
 
     def _add_serializable(self, name: str, value: Serializable) -> None:
         as_json = value.to_jsonable()
-        buf = json.dumps(as_json, indent=1).encode()
+        buf = _json_dumps(as_json)
         info = tarfile.TarInfo(name=name)
         info.size = len(buf)
         with io.BytesIO(buf) as fd:
@@ -646,7 +688,7 @@ class ZipWriter(Writer):
 
     def _add_serializable(self, name: str, value: Serializable) -> None:
         as_json = value.to_jsonable()
-        buf = json.dumps(as_json, indent=1).encode()
+        buf = _json_dumps(as_json)
         self.zipfile.writestr(name, buf)
 
     def add_product(self, bundle_path: str, data: IO[bytes]):
@@ -92,22 +92,31 @@ class PyGen:
         else:
             self.preambles[name] = body
 
-    def write(self, file: IO[str]):
-        # Write imports
+    def getvalue(self) -> str:
+        """
+        Return the generated code as a string
+        """
+        parts: List[str] = []
+
+        # Imports
         if self.plain_imports:
-            print("import", ", ".join(self.plain_imports), file=file)
+            parts.append(f"import {', '.join(self.plain_imports)}\n")
         for from_, names in self.from_imports.items():
             if not names:
                 continue
-            print("from", from_, "import", ", ".join(names), file=file)
-        print(file=file)
+            parts.append(f"from {from_} import {', '.join(names)}\n")
+        parts.append("\n")
 
-        # Write preambles
+        # Preambles
         for body in self.preambles.values():
-            print(body, file=file)
-            print(file=file)
+            parts.append(body)
+            parts.append("\n\n")
+
+        parts.append(self.body.getvalue())
+        return "".join(parts)
 
-        file.write(self.body.getvalue())
+    def write(self, file: IO[str]):
+        file.write(self.getvalue())
 
     def empty_line(self):
         """
@@ -171,10 +180,8 @@ class PyGen:
 
         for step in order.order_steps:
             name, parms = step.as_magics_macro()
-            py_parms = []
-            for k, v in parms.items():
-                py_parms.append(f"{k}={v!r}")
-            self.line(f"parts.append(macro.{name}({', '.join(py_parms)}))")
+            py_parms = ", ".join([f"{k}={v!r}" for k, v in parms.items()])
+            self.line(f"parts.append(macro.{name}({py_parms}))")
 
         self.line("with contextlib.redirect_stdout(io.StringIO()) as out:")
         with self.nested() as sub:
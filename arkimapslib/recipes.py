@@ -1,13 +1,16 @@
 # from __future__ import annotations
 import inspect
+import io
 import json
 import logging
 import os
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, TextIO, Type
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, FrozenSet, List, Optional, Sequence, TextIO, Type, Union
 
-from . import steps, toposort
+from . import steps
 from .config import Config
 from .lint import Lint
+from .mixers import mixers
 
 if TYPE_CHECKING:
     from . import pantry
@@ -72,27 +75,45 @@ class Recipes:
         if not self.new_derived:
             return
 
-        # Sort the postponed recipes topologically, so we can instantiate them
-        # in dependency order
-
-        # Start with the existing recipes, that have no dependencies
-        deps = {name: {} for name in self.recipes}
-
-        # Add the derived recipes in the queue
+        # Instantiate the postponed recipes in dependency order, walking the
+        # inheritance tree down from the recipes that are already available
+        children: Dict[str, List[str]] = defaultdict(list)
+        ready: Deque[str] = deque()
         for name, info in self.new_derived.items():
-            deps[name] = (info["extends"],)
-
-        # Instantiate recipes topologically sorted by dependencies
-        for name in toposort.sort(deps):
-            if name in self.recipes:
-                continue
+            if info["extends"] in self.recipes:
+                ready.append(name)
+            else:
+                children[info["extends"]].append(name)
 
+        while ready:
+            name = ready.popleft()
             info = self.new_derived.pop(name)
             parent = self.recipes[info.pop("extends")]
             kwargs = Recipe.inherit(name=name, parent=parent, **info)
             if lint:
                 Recipe.lint(lint, **kwargs)
             self.recipes[name] = Recipe(**kwargs)
+            ready.extend(children.pop(name, ()))
+
+        if not self.new_derived:
+            return
+
+        # Whatever is left extends a missing recipe, or leads to a loop
+        for name, info in self.new_derived.items():
+            if info["extends"] not in self.new_derived:
+                raise RuntimeError(f"{name} in {info['defined_in']!r} extends unknown recipe {info['extends']!r}")
+
+        # Follow the chain of parents until it comes back on itself
+        path: List[str] = []
+        name = min(self.new_derived)
+        while name not in path:
+            path.append(name)
+            name = self.new_derived[name]["extends"]
+        start = path.index(name)
+        loop = path[start:] + [name]
+        raise RuntimeError(
+            f"{name} in {self.new_derived[name]['defined_in']!r} is part of an inheritance loop: {' -> '.join(loop)}"
+        )
 
     def get(self, name: str):
         """
@@ -109,13 +130,15 @@ class RecipeStep:
     A step of a recipe
     """
 
+    __slots__ = ("name", "step", "args", "id")
+
     def __init__(self, name: str, step: Type[steps.Step], args: Kwargs, id: Optional[str] = None):
         self.name = name
         self.step = step
         self.args = args
         self.id = id
 
-    def get_input_names(self, step_config: steps.StepConfig) -> Set[str]:
+    def get_input_names(self, step_config: steps.StepConfig) -> FrozenSet[str]:
         """
         Get the names of inputs needed by this step
         """
@@ -143,6 +166,16 @@ class RecipeStep:
             res["id"] = self.id
         return res
 
+    def with_change(self, change: Dict[str, Any]) -> "RecipeStep":
+        """
+        Create a copy of this step, with the given changeset applied
+        """
+        args = dict(self.args)
+        self.step.apply_change(args, change)
+        args.pop("step", None)
+        args.pop("id", None)
+        return RecipeStep(name=self.name, step=self.step, args=args, id=self.id)
+
     def document(self, file: TextIO):
         """
         Document this recipe step
@@ -172,11 +205,9 @@ class Recipe:
         description: str = "Unnamed recipe",
         mixer: str = "default",
         info: Optional[Dict[str, Any]] = None,
-        recipe: Sequence[Dict[str, Any]] = (),
+        recipe: Sequence[Union[Dict[str, Any], RecipeStep]] = (),
         **kwargs,
     ):
-        from .mixers import mixers
-
         # Name of the recipe
         self.name = name
         # File where the recipe was defined
@@ -197,6 +228,10 @@ class Recipe:
         self.steps: List[RecipeStep] = []
         step_collection = mixers.get_steps(self.mixer)
         for s in recipe:
+            if isinstance(s, RecipeStep):
+                # Step already parsed by the recipe we are inheriting from
+                self.steps.append(s)
+                continue
             if not isinstance(s, dict):
                 raise RuntimeError("recipe step is not a dict")
             step = s.pop("step", None)
@@ -219,19 +254,19 @@ class Recipe:
         description: str = "Unnamed recipe",
         mixer: str = "default",
         info: Optional[Dict[str, Any]] = None,
-        recipe: Sequence[Dict[str, Any]] = (),
+        recipe: Sequence[Union[Dict[str, Any], RecipeStep]] = (),
         **kwargs: Any,
     ):
         for k, v in kwargs.items():
             lint.warn_recipe(f"Unknown parameter: {k!r}", defined_in=defined_in, name=name)
 
-        from .mixers import mixers
-
         if mixer not in mixers.registry:
             lint.warn_recipe(f"Unknown mixer: {mixer!r}", defined_in=defined_in, name=name)
         else:
             step_collection = mixers.get_steps(mixer)
             for s in recipe:
+                if isinstance(s, RecipeStep):
+                    s = s.derive()
                 if not isinstance(s, dict):
                     lint.warn_recipe(f"Recipe step {s!r} is not a dict", defined_in=defined_in, name=name)
                     continue
@@ -263,11 +298,20 @@ class Recipe:
         kwargs.setdefault("description", parent.description)
         kwargs.setdefault("mixer", parent.mixer)
 
-        # Build the new list of steps, based on the parent list
-        steps: List[Dict[str, Any]] = []
+        # Build the new list of steps, based on the parent list. Unchanged
+        # steps are shared with the parent, unless a different mixer requires
+        # parsing them again
+        reuse_steps = kwargs["mixer"] == parent.mixer
+        steps: List[Union[Dict[str, Any], RecipeStep]] = []
         for recipe_step in parent.steps:
+            step: Union[Dict[str, Any], RecipeStep]
             if recipe_step.id in changes:
-                step = recipe_step.change(changes[recipe_step.id])
+                if reuse_steps:
+                    step = recipe_step.with_change(changes[recipe_step.id])
+                else:
+                    step = recipe_step.change(changes[recipe_step.id])
+            elif reuse_steps:
+                step = recipe_step
             else:
                 step = recipe_step.derive()
             steps.append(step)
@@ -298,37 +342,40 @@ class Recipe:
         from .flavours import Flavour
 
         empty_flavour = Flavour(config=Config(), name="default", defined_in=__file__)
-        os.makedirs(os.path.dirname(dest), exist_ok=True)
-        with open(dest, "wt") as fd:
-            print(f"# {self.name}: {self.description}", file=fd)
-            print(file=fd)
-            print(f"Mixer: **{self.mixer}**", file=fd)
-            print(file=fd)
+        with io.StringIO() as out:
+            print(f"# {self.name}: {self.description}", file=out)
+            print(file=out)
+            print(f"Mixer: **{self.mixer}**", file=out)
+            print(file=out)
             if self.notes:
-                print("## Notes", file=fd)
-                print(file=fd)
-                print(self.notes, file=fd)
-                print(file=fd)
-            print("## Inputs", file=fd)
-            print(file=fd)
+                print("## Notes", file=out)
+                print(file=out)
+                print(self.notes, file=out)
+                print(file=out)
+            print("## Inputs", file=out)
+            print(file=out)
             # TODO: list only inputs explicitly required by the recipe
             for name in empty_flavour.list_inputs_recursive(self, pantry):
                 inputs = pantry.inputs.get(name)
                 if inputs is None:
-                    print(f"* **{name}** (input details are missing)", file=fd)
+                    print(f"* **{name}** (input details are missing)", file=out)
                 else:
-                    print(f"* **{name}**:", file=fd)
+                    print(f"* **{name}**:", file=out)
                     if len(inputs) == 1:
-                        inputs[0].document(indent=4, file=fd)
+                        inputs[0].document(indent=4, file=out)
                     else:
                         for i in inputs:
-                            print(f"    * Model **{i.model}**:", file=fd)
-                            i.document(indent=8, file=fd)
-            print(file=fd)
-            print("## Steps", file=fd)
-            print(file=fd)
+                            print(f"    * Model **{i.model}**:", file=out)
+                            i.document(indent=8, file=out)
+            print(file=out)
+            print("## Steps", file=out)
+            print(file=out)
             for step in self.steps:
-                print(f"### {step.name}", file=fd)
-                print(file=fd)
-                step.document(file=fd)
-                print(file=fd)
+                print(f"### {step.name}", file=out)
+                print(file=out)
+                step.document(file=out)
+                print(file=out)
+
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with open(dest, "wt") as fd:
+                fd.write(out.getvalue())
@@ -1,14 +1,12 @@
 # from __future__ import annotations
 import asyncio
 import contextlib
-import json
 import logging
 import os
-import shutil
-import subprocess
-import sys
 from collections import deque
-from typing import TYPE_CHECKING, Any, Deque, Dict, Generator, Iterable, List, Optional, Sequence, Set, Tuple, Union
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Sequence, Set, Tuple
 
 from . import outputbundle
 from .config import Config
@@ -47,18 +45,60 @@ def override_env(**kw):
                 os.environ[k] = v
 
 
-def groups(orders: Iterable["Order"], count: int) -> Generator[List["Order"], None, None]:
+def make_render_code(order: "Order", workdir: str) -> str:
     """
-    Given an iterable of orders, generate groups of maximum count items
+    Generate Python code that renders the given order into workdir
     """
-    group = []
-    for order in orders:
-        group.append(order)
-        if len(group) == count:
-            yield group
-            group = []
-    if group:
-        yield group
+    gen = PyGen()
+    gen.import_("macro", from_="Magics")
+    gen.empty_line()
+
+    with gen.render_function("order0") as sub:
+        order.print_python_function("order0", sub)
+    gen.empty_line()
+
+    gen.line(f"order0({workdir!r})")
+
+    return gen.getvalue()
+
+
+# Set to True in a worker process after worker_init has run
+_worker_initialized = False
+
+
+def worker_init(env_overrides: Dict[str, str]):
+    """
+    Prepare a render worker process to run orders
+    """
+    global _worker_initialized
+    for k, v in env_overrides.items():
+        os.environ[k] = v
+    # Our stdout may be carrying the output bundle: keep any output from
+    # Magics away from it
+    os.dup2(2, 1)
+    # Import Magics only once per worker, as it is slow to load
+    from Magics import macro  # noqa: F401
+
+    _worker_initialized = True
+
+
+def _render_worker(env_overrides: Dict[str, str], name: str, code: str) -> Tuple[Output, int]:
+    """
+    Run the render code for an order in a worker process.
+
+    Return the rendered output and the time it took to render it
+    """
+    if not _worker_initialized:
+        worker_init(env_overrides)
+
+    namespace: Dict[str, Any] = {"__name__": "__arkimaps_render__"}
+    exec(compile(code, f"<render {name}>", "exec"), namespace)
+
+    outputs = namespace["outputs"]
+    if not outputs:
+        raise RuntimeError(f"{name}: render code produced no output")
+    output = Output(*outputs[0])
+    return output, namespace["timings"][output.name]
 
 
 class Renderer:
@@ -74,34 +114,57 @@ class Renderer:
             # Tell magics not to print noisy banners
             "MAGPLUS_QUIET": "1",
         }
-        self.orders_by_name: Dict[Tuple[str, str], Order] = {}
-        self.renderer_dir = os.path.join(workdir, "renderers")
-        if os.path.exists(self.renderer_dir):
-            shutil.rmtree(self.renderer_dir)
-        os.makedirs(self.renderer_dir)
-        self.renderer_sequence = 0
+        # TODO: hardcoded default to os.cpu_count, can be configurable
+        self.max_workers = os.cpu_count() or 1
+        # Persistent pool of worker processes, reused across orders
+        self.executor = self.make_executor(self.max_workers)
+        # Single worker used to render again, one at a time, orders that
+        # failed because another order crashed their worker pool
+        self.retry_executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Shut down the render worker processes
+        """
+        self.executor.shutdown()
+        if self.retry_executor is not None:
+            self.retry_executor.shutdown()
+            self.retry_executor = None
+
+    def make_executor(self, max_workers: int) -> ProcessPoolExecutor:
+        """
+        Create a pool of render worker processes
+        """
+        return ProcessPoolExecutor(max_workers=max_workers)
+
+    def get_retry_executor(self) -> ProcessPoolExecutor:
+        """
+        Return the worker used to retry orders, starting it if needed
+        """
+        if self.retry_executor is None:
+            self.retry_executor = self.make_executor(1)
+        return self.retry_executor
 
     @contextlib.contextmanager
     def override_env(self):
         with override_env(**self.env_overrides):
             yield
 
-    def worker_init(self):
-        for k, v in self.env_overrides.items():
-            os.environ[k] = v
-
     def render(self, orders: Sequence["Order"], bundle: outputbundle.Writer) -> List["Order"]:
         """
         Render the given order list, adding results to the tar file.
 
         Return the list of orders that have been rendered
         """
-        orders_per_script = self.config.orders_per_script
-        log.debug("%d orders to dispatch in groups of %d", len(orders), orders_per_script)
+        log.debug("%d orders to dispatch", len(orders))
 
-        queue: Deque[str] = deque()
-        for group in groups(orders, orders_per_script):
-            queue.append(self.write_render_script(group))
+        queue: Deque["Order"] = deque(orders)
 
         if hasattr(asyncio, "run"):
             return asyncio.run(self.render_asyncio(queue, bundle))
@@ -111,117 +174,99 @@ class Renderer:
             res = loop.run_until_complete(self.render_asyncio(queue, bundle))
             return res
 
-    async def render_asyncio(self, queue: Deque[str], bundle: outputbundle.Writer) -> List["Order"]:
-        # TODO: hardcoded default to os.cpu_count, can be configurable
-        max_tasks = os.cpu_count() or 1
+    async def render_asyncio(self, queue: Deque["Order"], bundle: outputbundle.Writer) -> List["Order"]:
+        max_tasks = self.max_workers
         pending: Set[Any] = set()
-        log.debug("%d render scripts to run on %d parallel tasks", len(queue), max_tasks)
+        log.debug("%d orders to render on %d parallel workers", len(queue), max_tasks)
 
+        loop = asyncio.get_event_loop()
+        retry_lock = asyncio.Lock()
         rendered: List["Order"] = []
-        while queue or pending:
-            # Refill the queue
-            while queue and len(pending) < max_tasks:
-                script_file = queue.popleft()
-                pending.add(asyncio_create_task(self.run_render_script(script_file), name=script_file))
-
-            # Execute the queue
-            log.debug("Waiting for %d tasks", len(pending))
-            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
-            log.debug("%d tasks done, %d tasks pending", len(done), len(pending))
-
-            # Notify results
-            for task in done:
-                # Python 3.6 compat
-                if hasattr(task, "get_name"):
-                    log.debug("%s: task done", task.get_name())
-                try:
-                    orders = task.result()
-                except Exception as e:
-                    log.warning("Task execution failed: %s", e, exc_info=e)
-                    continue
-
-                for order in orders:
-                    order.add_to_bundle(self.workdir, bundle)
+        # Results are added to the bundle by a single writer thread, so the
+        # event loop can keep the workers busy in the meantime
+        bundled: List["asyncio.Future[None]"] = []
+        with ThreadPoolExecutor(max_workers=1) as bundle_writer:
+            while queue or pending:
+                # Refill the queue
+                while queue and len(pending) < max_tasks:
+                    order = queue.popleft()
+                    pending.add(asyncio_create_task(self.run_order(order, retry_lock), name=str(order)))
+
+                # Execute the queue
+                log.debug("Waiting for %d tasks", len(pending))
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                log.debug("%d tasks done, %d tasks pending", len(done), len(pending))
+
+                # Notify results
+                for task in done:
+                    # Python 3.6 compat
+                    if hasattr(task, "get_name"):
+                        log.debug("%s: task done", task.get_name())
+                    try:
+                        order = task.result()
+                    except Exception as e:
+                        log.warning("Task execution failed: %s", e, exc_info=e)
+                        continue
+
+                    bundled.append(loop.run_in_executor(bundle_writer, order.add_to_bundle, self.workdir, bundle))
                     rendered.append(order)
 
+            await asyncio.gather(*bundled)
+
         return rendered
 
-    def _parse_renderer_output(self, script_file: str, stdout: Union[str, bytes]) -> Dict[str, Any]:
+    def submit(self, executor: ProcessPoolExecutor, order: "Order", code: str) -> Future:
         """
-        Parse JSON output from a render script
+        Send the render code for an order to a worker pool
         """
-        if len(stdout.strip()) == 0:
-            raise RuntimeError(f"{script_file}: render script produced an empty output")
-        try:
-            render_info = json.loads(stdout)
-        except json.decoder.JSONDecodeError as e:
-            raise RuntimeError(f"{script_file}: render script produced invalid JSON") from e
-        return render_info
-
-    async def run_render_script(self, script_file: str) -> List["Order"]:
-        proc = await asyncio.create_subprocess_exec(sys.executable, script_file, stdout=asyncio.subprocess.PIPE)
-
-        stdout, stderr = await proc.communicate()
-        render_info = self._parse_renderer_output(script_file, stdout)
-        timings = render_info["timings"]
-        outputs = [Output(*o) for o in render_info["outputs"]]
-        orders: Set["Order"] = set()
-        for output in outputs:
-            # Set render information in the order
-            order = self.orders_by_name[(script_file, output.name)]
-            order.set_output(output, timing=timings[output.name])
-            orders.add(order)
-
-        return list(orders)
-
-    def render_one(self, order: "Order") -> Optional["Order"]:
-        script_file = self.write_render_script([order])
-
-        # Run the render script
-        res = subprocess.run([sys.executable, script_file], check=True, stdout=subprocess.PIPE)
-        render_info = self._parse_renderer_output(script_file, res.stdout)
-        timings = render_info["timings"]
-        outputs = [Output(*o) for o in render_info["outputs"]]
-        # Set render information in the order
-        output = outputs[0]
-        order = self.orders_by_name[(script_file, output.name)]
-        order.set_output(output, timing=timings[output.name])
-        return order
+        return executor.submit(_render_worker, self.env_overrides, str(order), code)
 
-    def write_render_script(self, orders: Sequence["Order"]) -> str:
+    def restart_executor(self, executor: ProcessPoolExecutor):
         """
-        Render one order to a Python renderer script.
-
-        Return the name of the file written
+        Replace a broken worker pool with a new one
         """
-        script_file = os.path.join(self.renderer_dir, f"renderer{self.renderer_sequence:03d}.py")
-        self.renderer_sequence += 1
-
-        gen = PyGen()
-
-        # Set env overrides
-        for k, v in self.env_overrides.items():
-            gen.line(f"os.environ[{k!r}] = {v!r}")
-        gen.empty_line()
-
-        # Import Magics, timing how long it takes
-        with gen.timed("import_magics") as sub:
-            sub.line("from Magics import macro")
-        gen.empty_line()
-
-        for idx, order in enumerate(orders):
-            name = f"order{idx}"
-            self.orders_by_name[(script_file, name)] = order
-            with gen.render_function(name) as sub:
-                order.print_python_function(name, sub)
-            gen.empty_line()
-
-        for idx, order in enumerate(orders):
-            gen.line(f"order{idx}({self.workdir!r})")
-        gen.empty_line()
-        gen.line("print(json.dumps({'timings': timings, 'outputs': outputs}))")
-
-        with open(script_file, "wt") as code:
-            gen.write(code)
+        # A worker dying (like when Magics crashes) breaks the whole pool:
+        # start a new one for the remaining orders
+        if executor is self.executor:
+            log.warning("a render worker died unexpectedly: restarting worker pool")
+            executor.shutdown(wait=False)
+            self.executor = self.make_executor(self.max_workers)
+        elif executor is self.retry_executor:
+            executor.shutdown(wait=False)
+            self.retry_executor = None
+
+    async def render_code(self, executor: ProcessPoolExecutor, order: "Order", code: str) -> Tuple[Output, int]:
+        """
+        Run the render code for an order on the given worker pool
+        """
+        try:
+            return await asyncio.wrap_future(self.submit(executor, order, code))
+        except BrokenProcessPool:
+            self.restart_executor(executor)
+            raise
+
+    async def run_order(self, order: "Order", retry_lock: asyncio.Lock) -> "Order":
+        # Generate code here, so that log messages stay in this process
+        code = make_render_code(order, self.workdir)
+        try:
+            output, timing = await self.render_code(self.executor, order, code)
+        except BrokenProcessPool:
+            # All orders running in a pool fail when one of its workers dies.
+            # Try again on a worker of its own, so that only the order that
+            # crashed gets lost
+            log.warning("%s: worker pool failed while rendering: trying again", order)
+            async with retry_lock:
+                output, timing = await self.render_code(self.get_retry_executor(), order, code)
+        order.set_output(output, timing=timing)
+        return order
 
-        return script_file
+    def render_one(self, order: "Order") -> Optional["Order"]:
+        code = make_render_code(order, self.workdir)
+        executor = self.executor
+        try:
+            output, timing = self.submit(executor, order, code).result()
+        except BrokenProcessPool:
+            self.restart_executor(executor)
+            raise
+        order.set_output(output, timing=timing)
+        return order
@@ -1,5 +1,5 @@
 # from __future__ import annotations
-from typing import Dict, Any, Optional, Set, Tuple, TYPE_CHECKING
+from typing import Dict, Any, FrozenSet, Optional, Set, Tuple, Type, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from . import inputs
@@ -8,6 +8,9 @@ if TYPE_CHECKING:
 # Used for kwargs-style dicts
 Kwargs = Dict[str, Any]
 
+# Shared result for steps that use no inputs
+NO_INPUTS: FrozenSet[str] = frozenset()
+
 
 class StepSkipped(Exception):
     """
@@ -25,6 +28,27 @@ class StepConfig:
     def __init__(self, name: str, options: Optional[Kwargs] = None, **kw):
         self.name = name
         self.options: Kwargs = options if options is not None else {}
+        # Step class defaults merged with options, cached by step class
+        self._merged_defaults: Dict[Type["Step"], Kwargs] = {}
+
+    def merged_defaults(self, step_class: Type["Step"]) -> Kwargs:
+        """
+        Return the defaults of step_class overridden by the options in this
+        configuration.
+
+        The result is shared across calls and must not be modified
+        """
+        res = self._merged_defaults.get(step_class)
+        if res is None:
+            if step_class.defaults is None:
+                res = self.options
+            else:
+                # Keep options first, as compile_args used to add them first
+                res = dict(self.options)
+                for k, v in step_class.defaults.items():
+                    res.setdefault(k, v)
+            self._merged_defaults[step_class] = res
+        return res
 
     def get_param(self, name: str) -> Any:
         return self.options.get(name)
@@ -35,6 +59,8 @@ class Step:
     One recipe step provided by a Mixer
     """
 
+    __slots__ = ("name", "params")
+
     defaults: Optional[Kwargs] = None
 
     def __init__(
@@ -68,15 +94,15 @@ class Step:
         """
         for name, value in change.items():
             if name == "params":
-                old_params = data.get("params")
-                if old_params is None:
-                    old_params = {}
-                    data["params"] = {}
+                # Work on a copy, as data may share its params with the
+                # recipe it was derived from
+                params = dict(data.get("params") or {})
                 for k, v in value.items():
                     if v is None:
-                        old_params.pop(k, None)
+                        params.pop(k, None)
                     else:
-                        old_params[k] = v
+                        params[k] = v
+                data["params"] = params
             else:
                 data[name] = value
 
@@ -89,23 +115,29 @@ class Step:
         # take args
         res = dict(args)
 
-        # add missing bits from step_config
-        for k, v in step_config.options.items():
-            res.setdefault(k, v)
-
-        # add missing bits from class config
-        if cls.defaults is not None:
-            for k, v in cls.defaults.items():
-                res.setdefault(k, v)
+        # add missing bits from step_config and class config
+        for k, v in step_config.merged_defaults(cls).items():
+            if k not in res:
+                res[k] = v
 
         return res
 
     @classmethod
-    def get_input_names(cls, step_config: StepConfig, args: Kwargs) -> Set[str]:
+    def get_arg(cls, step_config: StepConfig, args: Kwargs, name: str) -> Any:
+        """
+        Return the value that compile_args would compute for the argument
+        name, without building the whole argument set
+        """
+        if name in args:
+            return args[name]
+        return step_config.merged_defaults(cls).get(name)
+
+    @classmethod
+    def get_input_names(cls, step_config: StepConfig, args: Kwargs) -> FrozenSet[str]:
         """
         Return the list of input names used by this step
         """
-        return set()
+        return NO_INPUTS
 
 
 class MagicsMacro(Step):
@@ -113,6 +145,8 @@ class MagicsMacro(Step):
     Run a Magics macro with optional default arguments
     """
 
+    __slots__ = ()
+
     macro_name: str
 
     @classmethod
@@ -129,6 +163,8 @@ class AddBasemap(MagicsMacro):
     Add a base map
     """
 
+    __slots__ = ()
+
     macro_name = "mmap"
 
 
@@ -137,6 +173,8 @@ class AddCoastlinesBg(MagicsMacro):
     Add background coastlines
     """
 
+    __slots__ = ()
+
     macro_name = "mcoast"
     defaults = {
         "params": {
@@ -151,6 +189,8 @@ class AddSymbols(MagicsMacro):
     Add symbols settings
     """
 
+    __slots__ = ()
+
     macro_name = "msymb"
     defaults = {
         "params": {
@@ -168,6 +208,8 @@ class AddContour(MagicsMacro):
     Add contouring of the previous data
     """
 
+    __slots__ = ()
+
     macro_name = "mcont"
     defaults = {
         "params": {
@@ -206,6 +248,8 @@ class AddWind(MagicsMacro):
     Add wind flag rendering of the previous data
     """
 
+    __slots__ = ()
+
     macro_name = "mwind"
 
 
@@ -214,6 +258,8 @@ class AddGrid(MagicsMacro):
     Add a coordinates grid
     """
 
+    __slots__ = ()
+
     macro_name = "mcoast"
     defaults = {
         "params": {
@@ -227,6 +273,8 @@ class AddCoastlinesFg(MagicsMacro):
     Add foreground coastlines
     """
 
+    __slots__ = ()
+
     macro_name = "mcoast"
     defaults = {
         "params": {
@@ -245,6 +293,8 @@ class AddBoundaries(MagicsMacro):
     Add political boundaries
     """
 
+    __slots__ = ()
+
     macro_name = "mcoast"
     defaults = {
         "params": {
@@ -263,6 +313,8 @@ class AddGrib(Step):
     Add a grib file
     """
 
+    __slots__ = ("grib_input",)
+
     def __init__(
         self, step: str, step_config: StepConfig, params: Optional[Kwargs], sources: Dict[str, "inputs.InputFile"]
     ):
@@ -277,12 +329,14 @@ class AddGrib(Step):
             raise KeyError(f"{self.name}: input {input_name} not found. Available: {', '.join(sources.keys())}")
         self.grib_input = inp
 
-        if self.grib_input.info.mgrib:
-            params = self.params.get("params")
-            if params is None:
-                self.params["params"] = params = {}
-            for k, v in self.grib_input.info.mgrib.items():
-                params.setdefault(k, v)
+        # Merge mgrib settings from the step and from the input into params
+        mgrib = inp.info.mgrib
+        step_mgrib = self.params.get("mgrib")
+        if step_mgrib:
+            mgrib = {**step_mgrib, **mgrib} if mgrib else step_mgrib
+        if mgrib:
+            # Build a new dict, as params may be shared with the recipe
+            self.params["params"] = {**mgrib, **(self.params.get("params") or {})}
 
     @classmethod
     def lint(cls, lint: "Lint", **kwargs):
@@ -297,18 +351,15 @@ class AddGrib(Step):
         super().lint(lint, **kwargs)
 
     def as_magics_macro(self) -> Tuple[str, Dict[str, Any]]:
-        params = dict(self.params.get("mgrib", {}))
-        params.update(self.params.get("params", {}))
-        params["grib_input_file_name"] = self.grib_input.pathname
+        params = {**self.params.get("params", {}), "grib_input_file_name": self.grib_input.pathname}
         return "mgrib", params
 
     @classmethod
-    def get_input_names(cls, step_config: StepConfig, args: Kwargs) -> Set[str]:
+    def get_input_names(cls, step_config: StepConfig, args: Kwargs) -> FrozenSet[str]:
         res = super().get_input_names(step_config, args)
-        args = cls.compile_args(step_config, args)
-        grib_name = args.get("grib")
+        grib_name = cls.get_arg(step_config, args, "grib")
         if grib_name is not None:
-            res.add(grib_name)
+            res = res | {grib_name}
         return res
 
 
@@ -317,6 +368,8 @@ class AddUserBoundaries(Step):
     Add user-defined boundaries from a shapefile
     """
 
+    __slots__ = ("shape", "macro_params")
+
     def __init__(
         self, step: str, step_config: StepConfig, params: Optional[Kwargs], sources: Dict[str, "inputs.InputFile"]
     ):
@@ -330,6 +383,13 @@ class AddUserBoundaries(Step):
         if inp is None:
             raise KeyError(f"{self.name}: input {input_name} not found. Available: {', '.join(sources.keys())}")
         self.shape = inp
+        # Arguments for the Magics macro, which only depend on params and shape
+        self.macro_params = {
+            "map_user_layer": "on",
+            "map_user_layer_colour": "blue",
+            **self.params.get("params", {}),
+            "map_user_layer_name": inp.pathname,
+        }
 
     @classmethod
     def lint(cls, lint: "Lint", **kwargs):
@@ -341,26 +401,15 @@ class AddUserBoundaries(Step):
         #     lint.warn_recipe_step("'shape' must be a string", **kwargs)
         super().lint(lint, **kwargs)
 
-    def _run_params(self):
-        params = {
-            "map_user_layer": "on",
-            "map_user_layer_colour": "blue",
-        }
-        params.update(self.params.get("params", {}))
-        params["map_user_layer_name"] = self.shape.pathname
-        return params
-
     def as_magics_macro(self) -> Tuple[str, Dict[str, Any]]:
-        params = self._run_params()
-        return "mcoast", params
+        return "mcoast", self.macro_params
 
     @classmethod
-    def get_input_names(cls, step_config: StepConfig, args: Kwargs) -> Set[str]:
+    def get_input_names(cls, step_config: StepConfig, args: Kwargs) -> FrozenSet[str]:
         res = super().get_input_names(step_config, args)
-        args = cls.compile_args(step_config, args)
-        shape = args.get("shape")
+        shape = cls.get_arg(step_config, args, "shape")
         if shape is not None:
-            res.add(shape)
+            res = res | {shape}
         return res
 
     @classmethod
@@ -373,6 +422,8 @@ class AddGeopoints(Step):
     Add geopoints
     """
 
+    __slots__ = ("points",)
+
     def __init__(
         self, step: str, step_config: StepConfig, params: Optional[Kwargs], sources: Dict[str, "inputs.InputFile"]
     ):
@@ -403,10 +454,9 @@ class AddGeopoints(Step):
         return "mgeo", params
 
     @classmethod
-    def get_input_names(cls, step_config: StepConfig, args: Kwargs) -> Set[str]:
+    def get_input_names(cls, step_config: StepConfig, args: Kwargs) -> FrozenSet[str]:
         res = super().get_input_names(step_config, args)
-        args = cls.compile_args(step_config, args)
-        points = args.get("points")
+        points = cls.get_arg(step_config, args, "points")
         if points is not None:
-            res.add(points)
+            res = res | {points}
         return res
@@ -2,7 +2,9 @@
 import contextlib
 import datetime
 import fnmatch
+import functools
 import os
+import pickle
 import re
 import sys
 import tempfile
@@ -12,13 +14,24 @@ from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Type, Uni
 
 import yaml
 
-from .kitchen import Kitchen
-from .render import Renderer
+from .kitchen import Kitchen, read_recipe_dir
+from .render import Renderer, make_render_code
 
 if TYPE_CHECKING:
     from .orders import Order
 
 
+@functools.lru_cache(maxsize=None)
+def _read_recipe_dir_pickled(path: str) -> bytes:
+    """
+    Parse a recipe directory once per test run.
+
+    The result is pickled, so that each test can unpickle its own copy to
+    modify while loading it
+    """
+    return pickle.dumps(list(read_recipe_dir(path)), protocol=pickle.HIGHEST_PROTOCOL)
+
+
 class OrderResult:
     """
     Encapsulate the results of rendering an order, to be used for inspecting
@@ -114,9 +127,12 @@ class RecipeTestMixin:
         self.kitchen.__exit__(None, None, None)
         self.kitchen = None
 
-    def make_orders(self, flavour_name=None, recipe_name=None):
+    def make_orders(self, flavour_name=None, recipe_name=None, instant_filter=None):
         """
         Create all satisfiable orders from the currently tested recipe
+
+        If instant_filter is given, only create orders for the output
+        instants for which it returns True
         """
         if flavour_name is None:
             flavour_name = self.flavour_name
@@ -125,7 +141,7 @@ class RecipeTestMixin:
 
         recipe = self.kitchen.recipes.get(recipe_name)
         flavour = self.kitchen.flavours.get(flavour_name)
-        orders = flavour.make_orders(recipe, self.kitchen.pantry)
+        orders = flavour.make_orders(recipe, self.kitchen.pantry, instant_filter=instant_filter)
         return orders
 
     def load_recipes(self, recipe_dirs=None):
@@ -139,7 +155,10 @@ class RecipeTestMixin:
             return
         if recipe_dirs is None:
             recipe_dirs = ["recipes"]
-        self.kitchen.load_recipes(recipe_dirs)
+        for path in recipe_dirs:
+            contents = pickle.loads(_read_recipe_dir_pickled(os.path.abspath(path)))
+            self.kitchen.load_recipe_dir(path, contents=contents)
+        self.kitchen.recipes.resolve_derived()
         self.kitchen_recipes_loaded = True
 
     def fill_pantry(
@@ -206,12 +225,13 @@ class RecipeTestMixin:
         """
         Render an order, collecting a debug_trace of all steps invoked
         """
-        renderer = Renderer(self.kitchen.config, self.kitchen.workdir)
-
         # Stop testing at this point, if we know Magics would segfault or abort
         if self.id() in self.magics_crashes_skip_tests:
             raise unittest.SkipTest("disabled in .magics-crashes.yaml")
 
+        renderer = Renderer(self.kitchen.config, self.kitchen.workdir)
+        self.addCleanup(renderer.close)
+
         res = OrderResult(renderer, order)
 
         # Generate magics parts for testing
@@ -224,9 +244,7 @@ class RecipeTestMixin:
         self.assertEqual(add_basemap.params.get("params", {}), self.expected_basemap_args)
 
         # Test rendering to Python
-        script_pathname = renderer.write_render_script([order])
-        with open(script_pathname) as fd:
-            res.python_code = fd.read()
+        res.python_code = make_render_code(order, self.kitchen.workdir)
 
         # Test rendering with Magics
         rendered = renderer.render_one(order)
@@ -246,8 +264,10 @@ class RecipeTestMixin:
 
         Returns the name of the file with the Python trace>
         """
-        renderer = Renderer(self.kitchen.config, self.kitchen.workdir)
-        return renderer.render_one_to_python(order)
+        pathname = os.path.join(self.kitchen.workdir, "order.py")
+        with open(pathname, "wt") as fd:
+            fd.write(make_render_code(order, self.kitchen.workdir))
+        return pathname
 
     def assertProcessLogEqual(self, log: List[str]):
         """
@@ -40,6 +40,7 @@ setup(
     requires=["Magics", "yaml", "PIL"],
     extras_require={
         "arkimet": ["arkimet"],
+        "orjson": ["orjson"],
     },
     packages=['arkimapslib'],
     scripts=['arkimaps'],
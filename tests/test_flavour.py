@@ -284,6 +284,10 @@ class TestFlavour(unittest.TestCase):
             contour = self.get_step(orders[3], "add_contour")
             params = contour.params["params"]
             self.assertEqual(params["legend_only"], "on")
+
+            # The recipe is not changed by the legend order
+            recipe_step = [s for s in kitchen.recipes.get("test").steps if s.name == "add_contour"][0]
+            self.assertEqual(recipe_step.args["params"], {"legend": True})
             # self.assertTrue(params["test"], 256)
             # self.assertAlmostEqual(params["subpage_lower_left_latitude"], 21.9430455)
             # self.assertAlmostEqual(params["subpage_lower_left_longitude"], 11.25)
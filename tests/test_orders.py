@@ -1,5 +1,6 @@
 # from __future__ import annotations
 import datetime
+import pickle
 import unittest
 from typing import Any, Dict
 
@@ -77,3 +78,29 @@ class TestTypes(unittest.TestCase):
                 "bbox": [9.19, 43.71, 12.82, 45.14],
             },
         )
+
+    def test_pickle(self):
+        recipe = Recipe(
+            name="recipe",
+            defined_in="recipe.yaml",
+            recipe=[{"step": "add_basemap", "params": {"subpage_map_projection": "cylindrical"}}],
+        )
+
+        order = orders.MapOrder(flavour=self.flavour, instant=self.instant, recipe=recipe, input_files={})
+        order1 = pickle.loads(pickle.dumps(order, protocol=pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(str(order1), str(order))
+        self.assertEqual(order1.recipe.name, "recipe")
+        self.assertEqual(order1.flavour.name, "flavour")
+        self.assertEqual(order1.instant, self.instant)
+        self.assertEqual(
+            [s.params for s in order1.order_steps],
+            [{"params": {"subpage_map_projection": "cylindrical"}}],
+        )
+        self.assertIsNone(order1.output)
+
+        order = orders.TileOrder(
+            flavour=self.flavour, instant=self.instant, recipe=recipe, input_files={}, z=6, x=32, y=22, w=2, h=2
+        )
+        order1 = pickle.loads(pickle.dumps(order, protocol=pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(str(order1), str(order))
+        self.assertEqual((order1.x, order1.y, order1.z, order1.width, order1.height), (32, 22, 6, 2, 2))
@@ -65,6 +65,24 @@ class TestRecipe(unittest.TestCase):
         self.assertEqual(r2.steps[0].name, "add_basemap")
         self.assertEqual(r2.steps[0].id, "basemap")
         self.assertEqual(r2.steps[0].args, {"params": {"a": 1, "b": 3}})
+        # The parent recipe is not affected
+        self.assertEqual(r1.steps[0].args, {"params": {"a": 1, "b": 2, "c": 3}})
+
+    def test_inherit_add_params(self):
+        r1 = Recipe(name="test", defined_in="test.yaml", recipe=[
+                {"step": "add_basemap", "id": "basemap"},
+                {"step": "add_user_boundaries"}
+            ])
+
+        r2 = Recipe(**Recipe.inherit(name="test1", defined_in="test1.yaml", parent=r1, change={
+                "basemap": {"params": {"a": 1}},
+            }))
+
+        self.assertEqual(r2.steps[0].id, "basemap")
+        self.assertEqual(r2.steps[0].args, {"params": {"a": 1}})
+        self.assertEqual(r1.steps[0].args, {})
+        # Unchanged steps are shared with the parent
+        self.assertIs(r2.steps[1], r1.steps[1])
 
 
 class TestRecipes(unittest.TestCase):
@@ -97,3 +115,43 @@ class TestRecipes(unittest.TestCase):
 
         with self.assertRaises(Exception):
             recipes.resolve_derived()
+
+    def test_loop_message(self):
+        recipes = Recipes()
+        recipes.add_derived(name="test0", defined_in="test0.yaml", extends="test1")
+        recipes.add_derived(name="test1", defined_in="test1.yaml", extends="test2")
+        recipes.add_derived(name="test2", defined_in="test2.yaml", extends="test3")
+        recipes.add_derived(name="test3", defined_in="test3.yaml", extends="test2")
+
+        with self.assertRaisesRegex(
+            RuntimeError, r"^test2 in 'test2.yaml' is part of an inheritance loop: test2 -> test3 -> test2$"
+        ):
+            recipes.resolve_derived()
+
+    def test_missing_parent(self):
+        recipes = Recipes()
+        recipes.add(name="test", defined_in="test.yaml", recipe=[
+                {"step": "add_grib", "grib": "t2m"},
+            ])
+        recipes.add_derived(name="test1", defined_in="test1.yaml", extends="missing")
+        recipes.add_derived(name="test2", defined_in="test2.yaml", extends="test1")
+
+        with self.assertRaisesRegex(RuntimeError, "extends unknown recipe 'missing'"):
+            recipes.resolve_derived()
+
+    def test_inherit_chain(self):
+        recipes = Recipes()
+        recipes.add_derived(name="test2", defined_in="test2.yaml", extends="test1", change={
+                "input": {"grib": "t2mmax"},
+            })
+        recipes.add_derived(name="test1", defined_in="test1.yaml", extends="test", change={
+                "input": {"grib": "t2mavg"},
+            })
+        recipes.add(name="test", defined_in="test.yaml", recipe=[
+                {"step": "add_grib", "grib": "t2m", "id": "input"},
+            ])
+
+        recipes.resolve_derived()
+
+        self.assertEqual(recipes.get("test1").steps[0].args, {"grib": "t2mavg"})
+        self.assertEqual(recipes.get("test2").steps[0].args, {"grib": "t2mmax"})
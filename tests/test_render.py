@@ -1,7 +1,11 @@
 # from __future__ import annotations
+import datetime
 import os
 import tempfile
 import unittest
+from arkimapslib import flavours, orders
+from arkimapslib.inputs import Instant
+from arkimapslib.recipes import Recipe
 from arkimapslib.render import Renderer
 from arkimapslib.config import Config
 
@@ -46,3 +50,29 @@ class TestRender(unittest.TestCase):
                         " https://www.enricozini.org/blog/2021/debian/an-educational-debugging-session/"
                         " for details, and set PROJ_LIB=/usr/share/proj (or the"
                         " equivalent path in your system) as a workaround")
+
+    def test_code_generation_log(self):
+        # Log messages emitted while generating the render code reach the
+        # handlers of the main process
+        config = Config()
+        flavour = flavours.SimpleFlavour(
+            config=config,
+            name="flavour",
+            defined_in="flavour.yaml",
+            postprocess=[{"type": "cutshape", "shapefile": "shapes/Sottozone_allerta_ER.shp"}],
+        )
+        # Without add_basemap, the order cannot be georeferenced
+        recipe = Recipe(name="recipe", defined_in="recipe.yaml", recipe=[{"step": "add_coastlines_fg"}])
+        order = orders.MapOrder(
+            flavour=flavour,
+            recipe=recipe,
+            input_files={},
+            instant=Instant(reftime=datetime.datetime(2021, 1, 10), step=12),
+        )
+        with tempfile.TemporaryDirectory() as workdir:
+            with Renderer(config, workdir) as renderer:
+                with self.assertLogs("postprocess", level="WARNING") as logs:
+                    renderer.render_one(order)
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Order cannot be georeferenced", logs.output[0])
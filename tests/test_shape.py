@@ -58,8 +58,8 @@ class TestShape(TestCase):
         kitchen.pantry.fill(path="testdata/t2m/cosmo_t2m_2021_1_10_0_0_0+12.arkimet")
         orders = kitchen.make_orders(flavour="emro_web")
 
-        renderer = Renderer(config=kitchen.config, workdir=kitchen.workdir)
-        order = renderer.render_one(orders[0])
+        with Renderer(config=kitchen.config, workdir=kitchen.workdir) as renderer:
+            order = renderer.render_one(orders[0])
         imagefile = os.path.join(kitchen.workdir, order.output.relpath)
         img = Image.open(imagefile, mode="r")
         # TODO: this should change to match the cut region
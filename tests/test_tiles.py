@@ -99,6 +99,7 @@ class TestTiles(RecipeTestMixin, unittest.TestCase):
         )
 
         renderer = Renderer(self.kitchen.config, self.kitchen.workdir)
+        self.addCleanup(renderer.close)
         with tempfile.NamedTemporaryFile() as tf:
             with outputbundle.ZipWriter(out=tf) as bundle:
                 rendered = renderer.render(orders, bundle)
@@ -172,6 +173,7 @@ class TestTiles(RecipeTestMixin, unittest.TestCase):
         self.assertEqual(len(orders1), 5)
 
         renderer = Renderer(self.kitchen.config, self.kitchen.workdir)
+        self.addCleanup(renderer.close)
         with tempfile.NamedTemporaryFile() as tf:
             with outputbundle.ZipWriter(out=tf) as bundle:
                 renderer.render(orders1, bundle)
@@ -191,6 +193,7 @@ class TestTiles(RecipeTestMixin, unittest.TestCase):
         self.assertEqual(len(orders2), 5)
 
         renderer = Renderer(self.kitchen.config, self.kitchen.workdir)
+        self.addCleanup(renderer.close)
         with tempfile.NamedTemporaryFile() as tf:
             with outputbundle.ZipWriter(out=tf) as bundle:
                 renderer.render(orders2, bundle)
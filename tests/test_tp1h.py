@@ -24,16 +24,15 @@ class TP1HMixin:
         for i in tpdec1h:
             self.assertEqual(i.__class__.__name__, "Decumulate")
 
-        orders = self.make_orders()
         # Preprocessing means we cannot reduce test input to only get one
-        # order, so we get orders from every step from 0 to 12. We filter
-        # later to keep only +12h to test
+        # order, so we get inputs for every step from 0 to 12. We only make
+        # orders for +12h to test
+        orders = self.make_orders(instant_filter=lambda instant: instant.step == "12h")
         if self.model_name == "ifs":
             self.assertEqual(len(orders), 0)
             return
         else:
-            self.assertGreaterEqual(len(orders), 12)
-        orders = [o for o in orders if o.recipe.name == "tiles/tp1h" and o.instant.step == "12h"]
+            self.assertGreaterEqual(len(self.kitchen.pantry.get_instants("tpdec1h")), 12)
         self.assertEqual(len(orders), 1)
 
         self.assertRenders(orders[0])